@@ -3,13 +3,19 @@ from tkinter import ttk, messagebox, scrolledtext
 import os
 import webbrowser
 import threading
+import concurrent.futures
 import json
 import datetime
 import time
 import logging
 import tempfile
 import subprocess
-from github import Github, GithubException
+import shutil
+import hashlib
+import urllib.parse
+import itertools
+import weakref
+from github import Github, GithubException, GithubRetry
 from functools import partial
 
 
@@ -24,6 +30,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger("GitHubCompare")
 
+# Git executable resolved once, so spawning git does not search PATH every time
+GIT = shutil.which("git") or "git"
+
+# Maximum number of aliased objects requested in one GraphQL query
+GRAPHQL_BATCH_SIZE = 100
+
+# Remaining API quota below which write loops slow down, and below which they
+# wait for the rate limit to reset
+RATE_LIMIT_SLOWDOWN = 100
+RATE_LIMIT_PAUSE = 20
+
+# Background tasks running at once in the shared worker pool
+WORKER_THREADS = 4
+
+# Concurrent repository listings when fetching the user's and organizations' repositories
+ORG_FETCH_WORKERS = 8
+
+# Concurrent requests when fetching the stats of a comparison's commits
+COMMIT_STATS_WORKERS = 8
+
+# Concurrent page requests once the number of pages of a REST listing is known
+PAGE_FETCH_WORKERS = 8
+
+# Keep-alive HTTPS connections to the API; enough for every thread that can be
+# requesting at once, so none is discarded and re-handshaken
+HTTP_POOL_SIZE = WORKER_THREADS + max(ORG_FETCH_WORKERS, COMMIT_STATS_WORKERS, PAGE_FETCH_WORKERS)
+
+# Retries of a failed API request, backing off exponentially (1s, 2s, 4s, ...)
+# unless GitHub says how long to wait with Retry-After
+API_RETRIES = 5
+API_RETRY_BACKOFF = 1
+
+# Items per page for paginated listings; GitHub's maximum instead of its default of 30
+PAGE_SIZE = 100
+
+# Milliseconds without typing before the repository search filters the dropdowns
+SEARCH_DEBOUNCE_MS = 150
+
+# Cache lifetimes in seconds
+REPO_CACHE_TTL = 3600
+BRANCH_CACHE_TTL = 300
+REPO_OBJECT_TTL = 300
+
+# ETag validators kept in the disk cache: at most this many, each dropped once
+# it has not been revalidated for ETAG_CACHE_TTL seconds
+ETAG_CACHE_SIZE = 500
+ETAG_CACHE_TTL = 7 * 24 * 3600
+
+# Bare repositories, one per fork network, whose objects later clones borrow
+CLONE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "github-compare")
+
 class GitHubCompare:
     def __init__(self):
         self.root = tk.Tk()
@@ -33,14 +90,35 @@ class GitHubCompare:
         # Initialize variables
         self.github_token = ""
         self.g = None
+        self._repo_cache = {}
+        self._commit_stats = {}
+        self._commit_data = {}
+        self._repo_search_index = []
+        self._repo_search_last = ("", [])
+        self._repo_choices = []
+        self._rendered_commits = {}
+        self._repo_filter_after = None
         self.cache = {
             "repos": [],
             "branches": {},
+            "etags": {},
             "last_updated": None
         }
         
+        # Comparison state shared between the compare tabs
+        self.current_commits = []
+        self.origin_commits = []
+        self._comparison_shown = False
+        self._commit_by_sha = {}
+        self.current_parent = None
+        self.current_fork = None
+        self.origin_summary_header = ""
+        self.origin_ahead_by = 0
+        self.origin_behind_by = 0
+        
         # Load token from config file
         self.config_file = os.path.join(os.path.expanduser("~"), ".github_compare_config")
+        self.cache_file = os.path.join(os.path.expanduser("~"), ".github_compare_cache")
         self.load_config()
         
         # Create main frame with status bar
@@ -53,6 +131,22 @@ class GitHubCompare:
         self.status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # Shared worker pool for GitHub requests
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="github-compare")
+        
+        # Futures of running tasks by task id; entries go away once a finished
+        # future is no longer referenced
+        self._task_ids = itertools.count()
+        self.tasks = weakref.WeakValueDictionary()
+        
+        # Serializes updates of the clone cache between concurrent removals
+        self._clone_cache_lock = threading.Lock()
+        self._etag_lock = threading.Lock()
+        self._git_environ = None
+        
+        # Set when the window closes so that waiting background tasks stop early
+        self.cancel_event = threading.Event()
+        
         # Create progress bar (hidden by default)
         self.progress = ttk.Progressbar(self.root, mode="indeterminate")
         
@@ -122,6 +216,7 @@ class GitHubCompare:
         self.compare_branch_var = tk.StringVar()
         self.compare_branch_combo = ttk.Combobox(branch_frame, textvariable=self.compare_branch_var, width=30)
         self.compare_branch_combo.pack(side=tk.LEFT, padx=5)
+        self.compare_branch_combo.bind('<<ComboboxSelected>>', self.preview_comparison)
         
         # Compare button and filter options
         action_frame = ttk.Frame(top_frame)
@@ -272,10 +367,28 @@ class GitHubCompare:
     def init_github_client(self):
         """Initialize GitHub client with validation"""
         try:
+            # Only redraw so the message shows during the blocking validation below;
+            # a full update() would also run queued events re-entrantly
             self.status_var.set("Validating GitHub token...")
-            self.root.update()
+            self.root.update_idletasks()
+            
+            # Besides server errors and secondary rate limits, which PyGithub retries
+            # by default, also retry 429s and back off between attempts
+            retry = GithubRetry(total=API_RETRIES, backoff_factor=API_RETRY_BACKOFF,
+                                status_forcelist=[429] + list(range(500, 600)))
+            self.g = Github(self.github_token, per_page=PAGE_SIZE, pool_size=HTTP_POOL_SIZE, retry=retry)
+            self._repo_cache = {}
+            
+            # Start from an empty cache so a new account never sees, or saves under its
+            # own key, the previous account's data; load_cache fills in its own entry
+            self.cache = {
+                "repos": [],
+                "branches": {},
+                "etags": {},
+                "last_updated": None
+            }
+            self.update_repo_dropdowns([])
             
-            self.g = Github(self.github_token)
             # Test connection by getting user info
             user = self.g.get_user().login
             self.status_var.set(f"Connected as {user}")
@@ -308,72 +421,131 @@ class GitHubCompare:
         except Exception as e:
             print(f"Error saving config: {e}")
 
+    def token_hash(self):
+        """Key under which the current account's data is cached"""
+        return hashlib.sha256(self.github_token.encode()).hexdigest()
+
+    def read_cache_file(self):
+        """Read the per-account cache entries from disk"""
+        if os.path.exists(self.cache_file):
+            with open(self.cache_file, 'r') as f:
+                return json.load(f).get('accounts', {})
+        return {}
+
     def load_cache(self):
-        """Load cached data if available and not expired"""
-        cache_file = os.path.join(os.path.expanduser("~"), ".github_compare_cache")
+        """Load cached data for the current account, returning True if it is not expired"""
         try:
-            if os.path.exists(cache_file):
-                with open(cache_file, 'r') as f:
-                    self.cache = json.load(f)
+            cached = self.read_cache_file().get(self.token_hash())
+            if cached:
+                self.cache = cached
+                now = time.time()
+                self.cache['etags'] = {key: entry for key, entry in self.cache.get('etags', {}).items()
+                                       if now - entry[3] < ETAG_CACHE_TTL}
                 
-                # Check if cache is still valid (less than 1 hour old)
-                if self.cache.get('last_updated'):
-                    last_updated = datetime.datetime.fromisoformat(self.cache['last_updated'])
-                    if (datetime.datetime.now() - last_updated).total_seconds() < 3600:
-                        # Cache is valid, update UI
-                        self.repo_combo['values'] = self.cache['repos']
-                        self.origin_repo_combo['values'] = self.cache['repos']
-                        self.commit_list_repo_combo['values'] = self.cache['repos']  # Add this line
-                        self.status_var.set("Data loaded from cache")
-                        return True
+                # Show cached repositories even when stale, so startup works offline;
+                # the caller refreshes them in the background
+                if self.cache.get('repos'):
+                    self.update_repo_dropdowns(self.cache['repos'])
+                    self.status_var.set("Data loaded from cache")
+                
+                return self.is_fresh(self.cache.get('last_updated'), REPO_CACHE_TTL)
         except Exception as e:
             print(f"Error loading cache: {e}")
         
         return False
 
     def save_cache(self):
-        """Save data cache to file"""
-        cache_file = os.path.join(os.path.expanduser("~"), ".github_compare_cache")
+        """Save data cache to file, keeping entries of other accounts"""
         try:
-            self.cache['last_updated'] = datetime.datetime.now().isoformat()
-            with open(cache_file, 'w') as f:
-                json.dump(self.cache, f)
+            try:
+                accounts = self.read_cache_file()
+            except ValueError:
+                accounts = {}
+            accounts[self.token_hash()] = self.cache
+            # Serialize in one C-level dumps call and write once; json.dump would
+            # issue a write per encoded chunk, thousands for a large repo list.
+            # Workers add validators concurrently, so hold them still meanwhile
+            with self._etag_lock:
+                data = json.dumps({'accounts': accounts}).encode()
+            with open(self.cache_file, 'wb') as f:
+                f.write(data)
+            os.chmod(self.cache_file, 0o600)
         except Exception as e:
             print(f"Error saving cache: {e}")
 
+    def is_fresh(self, timestamp, ttl):
+        """Check whether an ISO timestamp is younger than ttl seconds"""
+        if not timestamp:
+            return False
+        age = datetime.datetime.now() - datetime.datetime.fromisoformat(timestamp)
+        return age.total_seconds() < ttl
+
+    def get_cached_branches(self, repo_name):
+        """Return cached branch names for a repository, or None if missing or expired"""
+        entry = self.cache['branches'].get(repo_name)
+        if entry and self.is_fresh(entry.get('updated'), BRANCH_CACHE_TTL):
+            return entry['names']
+        return None
+
+    def set_cached_branches(self, repo_name, branches):
+        """Store branch names for a repository in the cache"""
+        self.cache['branches'][repo_name] = {
+            "names": branches,
+            "updated": datetime.datetime.now().isoformat()
+        }
+
     def start_progress(self, message="Working..."):
         """Start progress indicator"""
+        # No forced update: the work runs in the background, so the main loop
+        # redraws the status bar as soon as this handler returns
         self.status_var.set(message)
         self.progress.pack(before=self.status_bar, fill=tk.X)
         self.progress.start(10)
-        self.root.update()
         
     def stop_progress(self, message="Ready"):
         """Stop progress indicator"""
         self.progress.stop()
         self.progress.pack_forget()
         self.status_var.set(message)
-        self.root.update()
 
-    def run_in_thread(self, func, *args, message="Working...", success_message="Complete", **kwargs):
-        """Run a function in a background thread with progress indication"""
+    def run_in_thread(self, func, *args, message="Working...", success_message="Complete", on_done=None, **kwargs):
+        """Run a function in the worker pool with progress indication
+        
+        If on_done is given it is called in the main thread with the function's result.
+        """
         self.start_progress(message)
         
-        def thread_func():
-            try:
-                result = func(*args, **kwargs)
-                self.root.after(0, lambda: self.stop_progress(success_message))
-                return result
-            except Exception as e:
-                error_message = str(e)  # Capture the error message
-                self.root.after(0, lambda error_msg=error_message: 
-                            self.handle_error(Exception(error_msg)))
-                return None
-                
-        thread = threading.Thread(target=thread_func)
-        thread.daemon = True
-        thread.start()
-        return thread
+        # next() on a count is atomic, so concurrent submits never share an id
+        task_id = next(self._task_ids)
+        future = self.executor.submit(func, *args, **kwargs)
+        self.tasks[task_id] = future
+        future.add_done_callback(partial(self._on_task_done, task_id, success_message, on_done))
+        return future
+
+    def _on_task_done(self, task_id, success_message, on_done, future):
+        """Schedule the UI update for a finished background task"""
+        if future.cancelled():
+            logger.info(f"Task {task_id} was cancelled")
+            return
+            
+        error = future.exception()
+        if isinstance(error, concurrent.futures.CancelledError):
+            # Raised by _wait_or_cancel while closing; the window may already be gone
+            logger.info(f"Task {task_id} was cancelled")
+            return
+        if error is not None:
+            logger.error(f"Task {task_id} failed: {str(error)}")
+            self.root.after(0, self.handle_error, error)
+            return
+            
+        self.root.after(0, self._finish_task, success_message, on_done, future)
+
+    def _finish_task(self, success_message, on_done, future):
+        """Update the UI for a successful background task in the main thread"""
+        # One scheduled callback per task; the result is read straight off the future
+        self.stop_progress(success_message)
+        if on_done is not None:
+            on_done(future.result())
 
     def handle_error(self, error):
         """Handle and display errors"""
@@ -387,50 +559,131 @@ class GitHubCompare:
             try:
                 # Fetch repositories with pagination
                 user = self.g.get_user()
-                repos = []
-                
-                # Get both user repositories and organization repositories
-                for repo in user.get_repos():
-                    repos.append(repo.full_name)
                 
-                # Get organizations the user belongs to
-                for org in user.get_orgs():
-                    for repo in org.get_repos():
-                        repos.append(repo.full_name)
+                # Page through the user's and every organization's repositories
+                # concurrently; each listing is a chain of blocking requests
+                orgs = [org.login for org in user.get_orgs()]
+                with concurrent.futures.ThreadPoolExecutor(max_workers=ORG_FETCH_WORKERS) as pool:
+                    listings = pool.map(self._fetch_repo_names, [None] + orgs)
                 
-                # Sort repositories by name
-                repos.sort()
+                    # Organization repositories the user is a member of show up in
+                    # both listings, so sort repositories by name without duplicates
+                    repos = sorted(set(itertools.chain.from_iterable(listings)))
                 
                 # Update cache
                 self.cache['repos'] = repos
+                self.cache['last_updated'] = datetime.datetime.now().isoformat()
                 self.save_cache()
                 
-                # Update UI in main thread
-                self.root.after(0, lambda: self.update_repo_dropdowns(repos))
+                return repos
                 
             except Exception as e:
                 raise Exception(f"Failed to fetch repositories: {str(e)}")
         
         # Run in background thread
-        self.run_in_thread(fetch_repos, message="Fetching repositories...", success_message="Repositories updated")
+        self.run_in_thread(fetch_repos, message="Fetching repositories...", success_message="Repositories updated",
+                           on_done=self.update_repo_dropdowns)
     
+    def _fetch_repo_names(self, org=None):
+        """List the full names of the viewer's or an organization's repositories
+        
+        Uses GraphQL so that each page carries only the names instead of full
+        REST repository objects.
+        """
+        query = """
+            query($org: String!, $cursor: String) {
+              organization(login: $org) {
+                repositories(first: 100, after: $cursor) {
+                  nodes { nameWithOwner }
+                  pageInfo { hasNextPage endCursor }
+                }
+              }
+            }
+        """
+        if org is None:
+            query = """
+                query($cursor: String) {
+                  viewer {
+                    repositories(first: 100, after: $cursor,
+                                 affiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER],
+                                 ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER]) {
+                      nodes { nameWithOwner }
+                      pageInfo { hasNextPage endCursor }
+                    }
+                  }
+                }
+            """
+        names = []
+        cursor = None
+        
+        while True:
+            if org is None:
+                data = self._graphql(query, {"cursor": cursor})["viewer"]
+            else:
+                data = self._graphql(query, {"org": org, "cursor": cursor})["organization"]
+            repositories = data["repositories"]
+            names.extend(node["nameWithOwner"] for node in repositories["nodes"])
+            
+            if not repositories["pageInfo"]["hasNextPage"]:
+                return names
+            cursor = repositories["pageInfo"]["endCursor"]
+
+    def get_repo(self, repo_name):
+        """Get a repository object, reusing one fetched in the last REPO_OBJECT_TTL seconds"""
+        # Entries expire so that settings changed on GitHub (default branch, fork
+        # parent) are picked up without restarting
+        entry = self._repo_cache.get(repo_name)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < REPO_OBJECT_TTL:
+            return entry[1]
+            
+        repo = self.g.get_repo(repo_name)
+        self._repo_cache[repo_name] = (now, repo)
+        return repo
+
     def update_repo_dropdowns(self, repos):
         """Update repository dropdowns with fetched data"""
+        # Lowercase the names once here rather than on every search
+        self._repo_search_index = [(repo.lower(), repo) for repo in repos]
+        self._repo_search_last = ("", self._repo_search_index)
+        self._repo_choices = repos
         self.repo_combo['values'] = repos
         self.origin_repo_combo['values'] = repos
         self.commit_list_repo_combo['values'] = repos
     
     def filter_repos(self, *args):
+        """Filter repositories once typing in the search entry pauses"""
+        # Each keystroke restarts the delay, so a burst of typing filters only once
+        if self._repo_filter_after is not None:
+            self.root.after_cancel(self._repo_filter_after)
+        self._repo_filter_after = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_repo_filter)
+
+    def apply_repo_filter(self):
         """Filter repositories based on search term"""
+        self._repo_filter_after = None
         search_term = self.repo_search_var.get().lower()
         if not search_term:
-            self.repo_combo['values'] = self.cache['repos']
-            self.origin_repo_combo['values'] = self.cache['repos']
+            self.set_repo_choices(self.cache['repos'])
             return
         
-        filtered_repos = [repo for repo in self.cache['repos'] if search_term in repo.lower()]
-        self.repo_combo['values'] = filtered_repos
-        self.origin_repo_combo['values'] = filtered_repos
+        # A name containing the new term also contains any part of it, so when the
+        # term only grew, e.g. while typing, just the last matches are searched
+        last_term, last_matches = self._repo_search_last
+        candidates = last_matches if last_term in search_term else self._repo_search_index
+        matches = [entry for entry in candidates if search_term in entry[0]]
+        self._repo_search_last = (search_term, matches)
+        
+        self.set_repo_choices([repo for _, repo in matches])
+
+    def set_repo_choices(self, repos):
+        """Show repositories in the searchable dropdowns unless they already show them"""
+        # Every assignment hands Tk the whole list again, so skip the ones that
+        # would not change it, e.g. when a longer term matches the same repositories
+        if repos == self._repo_choices:
+            return
+        self._repo_choices = repos
+        self.repo_combo['values'] = repos
+        self.origin_repo_combo['values'] = repos
 
     def update_branches(self, event=None):
         """Update branch lists when repository is selected"""
@@ -441,36 +694,61 @@ class GitHubCompare:
         def fetch_branches():
             try:
                 # Check if branches are cached
-                if repo_name in self.cache['branches']:
-                    branches = self.cache['branches'][repo_name]
-                else:
-                    repo = self.g.get_repo(repo_name)
-                    branches = [branch.name for branch in repo.get_branches()]
-                    self.cache['branches'][repo_name] = branches
+                repo = self.get_repo(repo_name)
+                branches = self.get_cached_branches(repo_name)
+                if branches is None:
+                    branches = self._fetch_branch_names(repo_name)
+                    self.set_cached_branches(repo_name, branches)
                     self.save_cache()
                 
-                # Update UI in main thread
-                self.root.after(0, lambda: self.update_branch_dropdowns(branches, repo_name))
+                # Read the default branch here rather than in the main thread, where
+                # a cold repository lookup would block the window
+                return branches, repo.default_branch
                 
             except Exception as e:
                 raise Exception(f"Failed to fetch branches: {str(e)}")
         
         # Run in background thread
         self.run_in_thread(fetch_branches, message=f"Fetching branches for {repo_name}...", 
-                         success_message=f"Branches updated for {repo_name}")
+                         success_message=f"Branches updated for {repo_name}",
+                         on_done=self.update_branch_dropdowns)
+
+    def _fetch_branch_names(self, repo_name):
+        """List a repository's branch names, revalidating previously seen pages by ETag
+        
+        The first page tells how many pages there are, so the rest are requested
+        concurrently instead of one after another.
+        """
+        path = f"/repos/{repo_name}/branches"
+        
+        def fetch_page(page):
+            # Only the names are kept, not the full branch objects
+            return self._conditional_request(path, {"per_page": PAGE_SIZE, "page": page},
+                                             extract=lambda data: [branch["name"] for branch in data])
+        
+        first_page, last_page = fetch_page(1)
+        pages = [first_page]
+        if last_page > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as pool:
+                pages += [names for names, _ in pool.map(fetch_page, range(2, last_page + 1))]
+        
+        # A page count remembered from an unchanged first page can be short if
+        # branches were added since, so keep going while pages come back full
+        while len(pages[-1]) == PAGE_SIZE:
+            pages.append(fetch_page(len(pages) + 1)[0])
+        return [name for names in pages for name in names]
 
-    def update_branch_dropdowns(self, branches, repo_name):
+    def update_branch_dropdowns(self, result):
         """Update branch dropdowns with fetched data"""
+        branches, default_branch = result
         self.base_branch_combo['values'] = branches
         self.compare_branch_combo['values'] = branches
         
         # Set default branch
-        try:
-            default_branch = self.g.get_repo(repo_name).default_branch
+        if default_branch:
             self.base_branch_var.set(default_branch)
-        except:
-            if branches:
-                self.base_branch_var.set(branches[0])
+        elif branches:
+            self.base_branch_var.set(branches[0])
 
     def update_origin_info(self, event=None):
         """Update origin repository information when repository is selected"""
@@ -480,25 +758,28 @@ class GitHubCompare:
             
         def fetch_origin_info():
             try:
-                repo = self.g.get_repo(repo_name)
+                repo = self.get_repo(repo_name)
                 parent = repo.parent
                 
                 if parent:
-                    # It's a fork - get branches from both repos
-                    repo_branches = [branch.name for branch in repo.get_branches()]
-                    parent_branches = [branch.name for branch in parent.get_branches()]
+                    # It's a fork - get branches from both repos, paging through the
+                    # parent's list on a side thread at the same time
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+                        parent_branches = pool.submit(self._fetch_branch_names, parent.full_name)
+                        repo_branches = self._fetch_branch_names(repo_name)
+                        parent_branches = parent_branches.result()
                     
                     # Cache the branches
-                    self.cache['branches'][repo_name] = repo_branches
-                    self.cache['branches'][parent.full_name] = parent_branches
+                    self.set_cached_branches(repo_name, repo_branches)
+                    self.set_cached_branches(parent.full_name, parent_branches)
                     self.save_cache()
                     
                     # Update UI in main thread
-                    self.root.after(0, lambda: self.update_origin_dropdowns(
-                        repo_branches, parent_branches, repo, parent))
+                    self.root.after(0, self.update_origin_dropdowns,
+                                   repo_branches, parent_branches, repo, parent)
                 else:
                     # Not a fork
-                    self.root.after(0, lambda: self.handle_not_fork(repo_name))
+                    self.root.after(0, self.handle_not_fork, repo_name)
                 
             except Exception as e:
                 raise Exception(f"Failed to fetch origin info: {str(e)}")
@@ -638,11 +919,15 @@ class GitHubCompare:
     def refresh_data(self):
         """Refresh all data from GitHub"""
         # Clear cache
+        # Validators are kept: revalidating with them still fetches anything that
+        # changed, and unchanged responses cost no rate limit
         self.cache = {
             "repos": [],
             "branches": {},
+            "etags": self.cache.get('etags', {}),
             "last_updated": None
         }
+        self._repo_cache = {}
         
         # Update repositories and branches
         self.update_repos()
@@ -653,9 +938,11 @@ class GitHubCompare:
     def clear_comparison_results(self):
         """Clear comparison results in both tabs"""
         # Clear local tab results
+        self._comparison_shown = False
         self.summary_label.config(text="No comparison results yet")
         
         # Clear all widgets in commits frame
+        self._rendered_commits.clear()
         for widget in self.local_commits_frame.winfo_children():
             widget.destroy()
             
@@ -679,41 +966,210 @@ class GitHubCompare:
             messagebox.showerror("Error", "Please select repository and branches")
             return
             
+        def fetch():
+            repo = self.get_repo(repo_name)
+            return self._fetch_comparison(repo, base_branch, compare_branch)
+        
+        self._do_compare(fetch,
+                         partial(self.display_comparison_results, repo_name=repo_name,
+                                 base_branch=base_branch, compare_branch=compare_branch),
+                         message=f"Comparing {base_branch} and {compare_branch}...",
+                         success_message="Comparison complete",
+                         error_prefix="Failed to compare branches")
+
+    def preview_comparison(self, event=None):
+        """Show ahead/behind counts for the selected branches without loading their commits"""
+        repo_name = self.repo_var.get()
+        base_branch = self.base_branch_var.get()
+        compare_branch = self.compare_branch_var.get()
+        
+        # The summary belongs to the comparison on display until it is cleared
+        if not repo_name or not base_branch or not compare_branch or self._comparison_shown:
+            return
+            
+        # Submitted directly rather than through run_in_thread: merely picking a
+        # branch should neither start the progress bar nor open an error dialog
+        future = self.executor.submit(self._fetch_comparison_counts, repo_name, base_branch, compare_branch)
+        self.tasks[next(self._task_ids)] = future
+        future.add_done_callback(partial(self._on_preview_done, (repo_name, base_branch, compare_branch)))
+
+    def _on_preview_done(self, selection, future):
+        """Schedule showing a finished comparison preview, or log why there is none"""
+        if future.cancelled():
+            return
+            
+        error = future.exception()
+        if error is not None:
+            # E.g. branches with unrelated histories; Compare Branches reports it if asked
+            logger.info(f"No preview for {selection[1]}...{selection[2]}: {str(error)}")
+            return
+            
+        self.root.after(0, self._show_preview, selection, future.result())
+
+    def _show_preview(self, selection, counts):
+        """Show ahead/behind counts in the summary in the main thread"""
+        # Drop previews for a selection that changed meanwhile, or that finished
+        # after a full comparison was displayed
+        current = (self.repo_var.get(), self.base_branch_var.get(), self.compare_branch_var.get())
+        if self._comparison_shown or selection != current:
+            return
+            
+        _, base_branch, compare_branch = selection
+        self.summary_label.config(
+            text=f"{base_branch}...{compare_branch}: {counts['ahead_by']} ahead, "
+                 f"{counts['behind_by']} behind (click Compare Branches to list the commits)")
+
+    def _fetch_comparison_counts(self, repo_name, base, head):
+        """Fetch only the ahead/behind counters of a comparison
+        
+        Requests a single commit per page from the compare endpoint so that no
+        Commit objects have to be built for the comparison's commit list. The
+        response still lists the changed files with their patches, so only the
+        counters are kept.
+        """
+        path = f"/repos/{repo_name}/compare/{urllib.parse.quote(base)}...{urllib.parse.quote(head)}"
+        return self._conditional_get(path, {"per_page": 1}, extract=lambda data: {
+            "status": data["status"],
+            "ahead_by": data["ahead_by"],
+            "behind_by": data["behind_by"],
+            "total_commits": data["total_commits"],
+        })
+
+    def _conditional_get(self, path, parameters=None, extract=None):
+        """GET a REST path, revalidating an earlier response with its ETag"""
+        return self._conditional_request(path, parameters, extract)[0]
+
+    def _conditional_request(self, path, parameters=None, extract=None):
+        """GET a REST path by ETag and return its data and the listing's last page number
+        
+        GitHub answers an unchanged resource with an empty 304 that does not count
+        against the rate limit, in which case the cached data is returned. The
+        validators are part of the account's disk cache, so they outlive a restart.
+        If extract is given, only its result is returned and cached, not the
+        whole response.
+        """
+        etags = self.cache['etags']
+        key = f"{path}?{urllib.parse.urlencode(sorted((parameters or {}).items()))}"
+        with self._etag_lock:
+            cached = etags.get(key)
+        if cached and time.time() - cached[3] >= ETAG_CACHE_TTL:
+            cached = None
+        headers = {"If-None-Match": cached[0]} if cached else None
+        
+        response_headers, data = self.g._Github__requester.requestJsonAndCheck(
+            "GET", path, parameters=parameters, headers=headers)
+        if data is None and cached:
+            last_page = self._last_page(response_headers.get("link")) or cached[2]
+            self._store_etag(key, cached[0], cached[1], last_page)
+            return cached[1], last_page
+            
+        last_page = self._last_page(response_headers.get("link")) or 1
+        if extract is not None:
+            data = extract(data)
+        if "etag" in response_headers:
+            self._store_etag(key, response_headers["etag"], data, last_page)
+        return data, last_page
+
+    def _store_etag(self, key, etag, data, last_page):
+        """Remember a validated response, evicting the least recently validated ones"""
+        with self._etag_lock:
+            etags = self.cache['etags']
+            # Re-inserting moves the entry to the end, so the dict stays ordered
+            # from least to most recently validated
+            etags.pop(key, None)
+            etags[key] = [etag, data, last_page, time.time()]
+            while len(etags) > ETAG_CACHE_SIZE:
+                del etags[next(iter(etags))]
+
+    def _last_page(self, link_header):
+        """Read the last page number from a Link header, None if it names no last page"""
+        for link in (link_header or "").split(","):
+            url, _, rel = link.partition(";")
+            if 'rel="last"' in rel:
+                query = urllib.parse.urlparse(url.strip().strip("<>")).query
+                return int(urllib.parse.parse_qs(query)["page"][0])
+        return None
+
+    def _fetch_comparison(self, repo, base, head):
+        """Fetch a comparison and return the fields the result views need"""
+        comparison = repo.compare(base, head)
+        commits = list(comparison.commits)
+        self._prefetch_commit_stats(commits)
+        return {
+            "status": comparison.status,
+            "ahead_by": comparison.ahead_by,
+            "behind_by": comparison.behind_by,
+            "commits": commits,
+        }
+
+    def _prefetch_commit_stats(self, commits):
+        """Fetch the stats of commits not seen before, several at a time
+        
+        Compared commits come without stats, so each one costs a request; doing
+        them here keeps display_commits from issuing them one by one on the UI thread.
+        """
+        missing = [commit for commit in commits if commit.sha not in self._commit_stats]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=COMMIT_STATS_WORKERS) as pool:
+            list(pool.map(self._cached_commit_stats, missing))
+
+    def _cached_commit_stats(self, commit):
+        """Return a commit's stats text, fetching and remembering it on first use"""
+        if commit.sha in self._commit_stats:
+            return self._commit_stats[commit.sha]
+            
+        try:
+            stats_text = self._commit_stats_text(commit)
+        except GithubException as e:
+            if e.status not in (404, 422):
+                # E.g. a server error or rate limit; the next render tries again
+                logger.info(f"Could not fetch stats of {commit.sha[:7]}: {str(e)}")
+                return None
+            # The commit has no stats to fetch, so remember that
+            stats_text = None
+        self._commit_stats[commit.sha] = stats_text
+        return stats_text
+
+    def _commit_stats_text(self, commit):
+        """Describe a commit's changed files and line counts, or return None if unavailable"""
+        stats = commit.stats
+        if not stats:
+            return None
+            
+        # Reading stats already completed the commit with its full JSON, which
+        # includes the changed files, so no second request is needed for them
+        try:
+            num_files = len(commit.files)
+            stats_text = f"{num_files} file{'s' if num_files != 1 else ''} changed: "
+        except Exception:
+            # Fall back to just showing additions/deletions if we can't get file count
+            stats_text = f"{stats.total} changes: "
+        return stats_text + f"+{stats.additions}, -{stats.deletions}"
+
+    def _do_compare(self, fetch, render, message, success_message, error_prefix):
+        """Run a comparison fetch in a background thread and render the result in the main thread"""
         def perform_comparison():
             try:
-                repo = self.g.get_repo(repo_name)
-                
-                # Get the comparison
-                comparison = repo.compare(base_branch, compare_branch)
-                
-                # Store commits for filter use
-                self.current_commits = comparison.commits
-                
-                # Update UI in main thread
-                self.root.after(0, lambda: self.display_comparison_results(
-                    comparison, repo_name, base_branch, compare_branch))
-                
+                return fetch()
             except Exception as e:
-                raise Exception(f"Failed to compare branches: {str(e)}")
+                raise Exception(f"{error_prefix}: {str(e)}")
         
         # Run in background thread
-        self.run_in_thread(perform_comparison, 
-                         message=f"Comparing {base_branch} and {compare_branch}...", 
-                         success_message="Comparison complete")
+        self.run_in_thread(perform_comparison, message=message, success_message=success_message, on_done=render)
 
     def display_comparison_results(self, comparison, repo_name, base_branch, compare_branch):
         """Display comparison results in the local tab"""
-        # Clear previous results
-        for widget in self.local_commits_frame.winfo_children():
-            widget.destroy()
-            
+        # Store commits for filter use
+        self.current_commits = comparison["commits"]
+        self._comparison_shown = True
+        self._index_commits()
+        
         # Update summary
         summary_text = f"Comparing {base_branch}...{compare_branch} in {repo_name}\n"
-        summary_text += f"Status: {comparison.status}\n"
-        summary_text += f"Total commits: {len(comparison.commits)}"
+        summary_text += f"Status: {comparison['status']}\n"
+        summary_text += f"Total commits: {len(comparison['commits'])}"
         
-        if comparison.ahead_by is not None and comparison.behind_by is not None:
-            summary_text += f" ({comparison.ahead_by} ahead, {comparison.behind_by} behind)"
+        if comparison["ahead_by"] is not None and comparison["behind_by"] is not None:
+            summary_text += f" ({comparison['ahead_by']} ahead, {comparison['behind_by']} behind)"
             
         self.summary_label.config(text=summary_text)
         
@@ -722,30 +1178,49 @@ class GitHubCompare:
 
     def refresh_commits_display(self):
         """Refresh the commits display based on filter settings"""
+        self._render_commits(self.current_commits, self.local_commits_frame, is_origin=False,
+                             only_recent=self.only_show_recent_var.get(),
+                             only_verified=self.only_show_verified_var.get())
+
+    def _render_commits(self, commits, parent_frame, is_origin, only_recent, only_verified):
+        """Clear a results frame and display the commits that pass the filters"""
+        # Apply filters
+        filtered_commits = self.apply_commit_filters(commits, only_recent, only_verified) if commits else None
+        
+        # Rebuilding destroys and recreates several widgets per commit, so keep the
+        # frame when it already shows the same commits, e.g. after toggling a filter
+        # that excludes none of them
+        shown = (None if filtered_commits is None else tuple(c.sha for c in filtered_commits),
+                 is_origin and bool(self.current_fork))
+        if self._rendered_commits.get(str(parent_frame)) == shown:
+            return
+        self._rendered_commits[str(parent_frame)] = shown
+        
         # Clear previous results
-        for widget in self.local_commits_frame.winfo_children():
+        for widget in parent_frame.winfo_children():
             widget.destroy()
             
-        if not self.current_commits:
+        if not commits:
             return
             
-        # Apply filters
-        filtered_commits = self.apply_commit_filters(self.current_commits)
-        
         # Display commits
-        self.display_commits(filtered_commits, self.local_commits_frame, is_origin=False)
+        self.display_commits(filtered_commits, parent_frame, is_origin=is_origin)
+        
+        # Stats that failed to load are retried by the next redraw, so do not keep it
+        if any(c.sha not in self._commit_stats for c in filtered_commits):
+            del self._rendered_commits[str(parent_frame)]
 
-    def apply_commit_filters(self, commits):
+    def apply_commit_filters(self, commits, only_recent, only_verified):
         """Apply filters to commits"""
         filtered = commits
         
         # Filter for recent commits (last 30 days) if enabled
-        if self.only_show_recent_var.get():
+        if only_recent:
             cutoff_date = datetime.datetime.now() - datetime.timedelta(days=30)
             filtered = [c for c in filtered if c.commit.author.date > cutoff_date]
             
         # Filter for verified commits if enabled
-        if self.only_show_verified_var.get():
+        if only_verified:
             filtered = [c for c in filtered if c.commit.verification and c.commit.verification.verified]
             
         return filtered
@@ -795,24 +1270,14 @@ class GitHubCompare:
             author_label = ttk.Label(info_frame, text=f"{author} committed on {date}")
             author_label.pack(side=tk.LEFT, padx=5)
             
-            # Stats (if available)
-            if hasattr(commit, 'stats') and commit.stats:
-                # Get number of files changed - we need to fetch the detailed commit to get this info
-                try:
-                    detailed_commit = self.g.get_repo(commit.repository.full_name).get_commit(commit.sha)
-                    num_files = len(detailed_commit.files)
-                    stats_text = f"{num_files} file{'s' if num_files != 1 else ''} changed: "
-                    stats_text += f"+{commit.stats.additions}, -{commit.stats.deletions}"
-                    
-                    stats_label = ttk.Label(info_frame, text=stats_text)
-                    stats_label.pack(side=tk.RIGHT, padx=5)
-                except Exception:
-                    # Fall back to just showing additions/deletions if we can't get file count
-                    stats_text = f"{commit.stats.total} changes: "
-                    stats_text += f"+{commit.stats.additions}, -{commit.stats.deletions}"
-                    
-                    stats_label = ttk.Label(info_frame, text=stats_text)
-                    stats_label.pack(side=tk.RIGHT, padx=5)
+            # Stats (if available). A commit never changes, so its stats are fetched
+            # once, normally by _prefetch_commit_stats, and reused when the list is
+            # redrawn, e.g. after toggling a filter
+            stats_text = self._cached_commit_stats(commit)
+                
+            if stats_text:
+                stats_label = ttk.Label(info_frame, text=stats_text)
+                stats_label.pack(side=tk.RIGHT, padx=5)
             
             # Action buttons
             btn_frame = ttk.Frame(commit_frame)
@@ -822,7 +1287,7 @@ class GitHubCompare:
             view_diff_btn = ttk.Button(
                 btn_frame, 
                 text="View Diff", 
-                command=lambda c=commit: webbrowser.open_new(c.html_url)
+                command=partial(self._on_view_commit, commit.sha)
             )
             view_diff_btn.pack(side=tk.LEFT, padx=5)
             
@@ -831,10 +1296,23 @@ class GitHubCompare:
                 merge_btn = ttk.Button(
                     btn_frame, 
                     text="Merge This Commit", 
-                    command=lambda c=commit: self.merge_commit(c)
+                    command=partial(self._on_merge_commit, commit.sha)
                 )
                 merge_btn.pack(side=tk.LEFT, padx=5)
 
+    def _index_commits(self):
+        """Rebuild the SHA lookup used by the commit action buttons"""
+        self._commit_by_sha = {c.sha: c for c in self.current_commits}
+        self._commit_by_sha.update((c.sha, c) for c in self.origin_commits)
+
+    def _on_view_commit(self, sha):
+        """Open the diff of a displayed commit in the browser"""
+        webbrowser.open_new(self._commit_by_sha[sha].html_url)
+
+    def _on_merge_commit(self, sha):
+        """Merge a displayed commit into the fork"""
+        self.merge_commit(self._commit_by_sha[sha])
+
     def compare_with_origin(self):
         """Compare fork with parent repository"""
         repo_name = self.origin_repo_var.get()
@@ -849,62 +1327,45 @@ class GitHubCompare:
             messagebox.showerror("Error", "Selected repository is not a fork or parent info not available")
             return
             
-        def perform_origin_comparison():
-            try:
-                # Get repositories
-                fork_repo = self.g.get_repo(repo_name)
-                parent_repo = self.current_parent
-                
-                # Get the comparison (parent base <- fork head)
-                comparison = parent_repo.compare(origin_branch, f"{fork_repo.owner.login}:{base_branch}")
-                
-                # Get the reverse comparison to see what's behind (fork base <- parent head)
-                reverse_comparison = fork_repo.compare(base_branch, f"{parent_repo.owner.login}:{origin_branch}")
-                
-                # Store commits for filter use
-                self.origin_commits = reverse_comparison.commits
-                
-                # Update UI in main thread
-                self.root.after(0, lambda: self.display_origin_comparison_results(
-                    comparison, reverse_comparison, fork_repo, parent_repo, base_branch, origin_branch))
-                
-            except Exception as e:
-                raise Exception(f"Failed to compare with origin: {str(e)}")
-        
-        # Run in background thread
-        self.run_in_thread(perform_origin_comparison, 
-                         message=f"Comparing with origin...", 
-                         success_message="Origin comparison complete")
+        parent_repo = self.current_parent
+        
+        def fetch():
+            fork_repo = self.get_repo(repo_name)
+            # Parent base <- fork head tells how far ahead the fork is; fork base <- parent
+            # head lists the commits the fork is behind by. The two are independent, so
+            # the counts are fetched on a side thread while the commit list downloads
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+                ahead = pool.submit(self._fetch_comparison_counts, parent_repo.full_name, origin_branch,
+                                    f"{fork_repo.owner.login}:{base_branch}")
+                behind = self._fetch_comparison(fork_repo, base_branch, f"{parent_repo.owner.login}:{origin_branch}")
+                return ahead.result(), behind, fork_repo
+        
+        def render(result):
+            ahead, behind, fork_repo = result
+            self.display_origin_comparison_results(ahead, behind, fork_repo, parent_repo, base_branch, origin_branch)
+        
+        self._do_compare(fetch, render,
+                         message=f"Comparing with origin...",
+                         success_message="Origin comparison complete",
+                         error_prefix="Failed to compare with origin")
 
     def display_origin_comparison_results(self, comparison, reverse_comparison, fork_repo, parent_repo, base_branch, origin_branch):
         """Display origin comparison results"""
-        # Clear previous results
-        for widget in self.origin_commits_frame.winfo_children():
-            widget.destroy()
-            
-        # Update summary
+        # Store commits for filter use
+        self.origin_commits = reverse_comparison["commits"]
+        self._index_commits()
+        
+        # Store counters so the summary can be updated without re-comparing
         fork_name = fork_repo.full_name
         parent_name = parent_repo.full_name
         
-        summary_text = f"Comparing {fork_name}:{base_branch} with {parent_name}:{origin_branch}\n"
-        summary_text += f"Your branch is "
-        
-        if comparison.ahead_by > 0:
-            summary_text += f"{comparison.ahead_by} commit(s) ahead"
-            
-        if comparison.ahead_by > 0 and reverse_comparison.ahead_by > 0:
-            summary_text += " and "
-            
-        if reverse_comparison.ahead_by > 0:
-            summary_text += f"{reverse_comparison.ahead_by} commit(s) behind"
-            
-        if comparison.ahead_by == 0 and reverse_comparison.ahead_by == 0:
-            summary_text += "up to date with the parent branch"
-            
-        self.origin_summary_label.config(text=summary_text)
+        self.origin_summary_header = f"Comparing {fork_name}:{base_branch} with {parent_name}:{origin_branch}\n"
+        self.origin_ahead_by = comparison["ahead_by"]
+        self.origin_behind_by = reverse_comparison["ahead_by"]
+        self.update_origin_summary()
         
         # Enable PR button if ahead
-        if comparison.ahead_by > 0:
+        if self.origin_ahead_by > 0:
             self.create_pr_btn.config(state=tk.NORMAL)
         else:
             self.create_pr_btn.config(state=tk.DISABLED)
@@ -912,32 +1373,30 @@ class GitHubCompare:
         # Display commits from parent that are not in fork (behind commits)
         self.refresh_origin_commits_display()
 
-    def refresh_origin_commits_display(self):
-        """Refresh the origin commits display based on filter settings"""
-        # Clear previous results
-        for widget in self.origin_commits_frame.winfo_children():
-            widget.destroy()
+    def update_origin_summary(self):
+        """Update the origin summary label from the stored ahead/behind counters"""
+        summary_text = self.origin_summary_header
+        summary_text += f"Your branch is "
+        
+        if self.origin_ahead_by > 0:
+            summary_text += f"{self.origin_ahead_by} commit(s) ahead"
             
-        if not self.origin_commits:
-            return
+        if self.origin_ahead_by > 0 and self.origin_behind_by > 0:
+            summary_text += " and "
             
-        # Apply filters based on the origin tab's filter settings
-        only_recent = self.origin_only_show_recent_var.get()
-        only_verified = self.origin_only_show_verified_var.get()
-        
-        filtered_commits = self.origin_commits
-        
-        # Filter for recent commits if enabled
-        if only_recent:
-            cutoff_date = datetime.datetime.now() - datetime.timedelta(days=30)
-            filtered_commits = [c for c in filtered_commits if c.commit.author.date > cutoff_date]
+        if self.origin_behind_by > 0:
+            summary_text += f"{self.origin_behind_by} commit(s) behind"
             
-        # Filter for verified commits if enabled
-        if only_verified:
-            filtered_commits = [c for c in filtered_commits if c.commit.verification and c.commit.verification.verified]
-        
-        # Display filtered commits
-        self.display_commits(filtered_commits, self.origin_commits_frame, is_origin=True)
+        if self.origin_ahead_by == 0 and self.origin_behind_by == 0:
+            summary_text += "up to date with the parent branch"
+            
+        self.origin_summary_label.config(text=summary_text)
+
+    def refresh_origin_commits_display(self):
+        """Refresh the origin commits display based on filter settings"""
+        self._render_commits(self.origin_commits, self.origin_commits_frame, is_origin=True,
+                             only_recent=self.origin_only_show_recent_var.get(),
+                             only_verified=self.origin_only_show_verified_var.get())
 
     def merge_commit(self, commit):
         """Merge a specific commit from parent repo into fork"""
@@ -954,10 +1413,25 @@ class GitHubCompare:
         if not response:
             return
             
+        base_branch = self.origin_base_branch_var.get()
+        origin_branch = self.origin_compare_branch_var.get()
+        
         def perform_merge():
             try:
                 # Apply the cherry-pick via API
-                base_branch = self.origin_base_branch_var.get()
+                
+                # Skip the merge if the commit is already an ancestor of the base branch;
+                # the counts-only compare avoids building the full diff
+                try:
+                    counts = self._fetch_comparison_counts(self.current_fork.full_name, commit.sha, base_branch)
+                    if counts["status"] in ("ahead", "identical"):
+                        logger.info(f"Commit {commit.sha[:7]} is already in {base_branch}, skipping merge")
+                        self.root.after(0, self.after_merge, commit.sha,
+                                        self._fetch_origin_counts(base_branch, origin_branch))
+                        return None
+                except GithubException:
+                    # The fork does not know the commit yet, so it cannot be merged already
+                    pass
                 
                 # Create a temporary branch from the base
                 temp_branch = f"temp-merge-{commit.sha[:7]}"
@@ -984,7 +1458,8 @@ class GitHubCompare:
                 self.current_fork.get_git_ref(f"heads/{temp_branch}").delete()
                 
                 # Update UI in main thread
-                self.root.after(0, lambda: self.after_merge())
+                self.root.after(0, self.after_merge, commit.sha,
+                                self._fetch_origin_counts(base_branch, origin_branch))
                 
                 return merge_result
                 
@@ -996,10 +1471,53 @@ class GitHubCompare:
                          message=f"Merging commit {commit.sha[:7]}...", 
                          success_message=f"Commit {commit.sha[:7]} merged successfully")
 
-    def after_merge(self):
-        """Update display after merging a commit"""
-        # Refresh the comparison
-        self.compare_with_origin()
+    def _fetch_origin_counts(self, base_branch, origin_branch):
+        """Fetch how far the fork is ahead of and behind the parent, or None on failure"""
+        fork = self.current_fork
+        parent = self.current_parent
+        try:
+            ahead = self._fetch_comparison_counts(parent.full_name, origin_branch, f"{fork.owner.login}:{base_branch}")
+            behind = self._fetch_comparison_counts(fork.full_name, base_branch, f"{parent.owner.login}:{origin_branch}")
+        except GithubException as e:
+            logger.info(f"Could not refresh origin counts: {str(e)}")
+            return None
+        return ahead["ahead_by"], behind["ahead_by"]
+
+    def after_merge(self, commit_sha, counts=None):
+        """Update display after merging a commit
+        
+        counts is the fork's (ahead_by, behind_by) after the merge, if it could be fetched.
+        """
+        # Merging a commit brings in its ancestors too, so drop it and every listed
+        # commit reachable through its parents instead of re-running the comparison;
+        # clicking Compare again refreshes it. The list is ordered by date, not by
+        # ancestry, so earlier commits are not necessarily merged
+        listed = {c.sha: c for c in self.origin_commits}
+        merged = set()
+        pending = [commit_sha]
+        while pending:
+            sha = pending.pop()
+            if sha in merged or sha not in listed:
+                continue
+            merged.add(sha)
+            pending.extend(parent.sha for parent in listed[sha].parents)
+        
+        self.origin_commits = [c for c in self.origin_commits if c.sha not in merged]
+        self._index_commits()
+        
+        if counts is not None:
+            self.origin_ahead_by, self.origin_behind_by = counts
+        else:
+            self.origin_behind_by = max(self.origin_behind_by - len(merged), 0)
+        
+        # The merge commits make the fork ahead of the parent
+        if self.origin_ahead_by > 0:
+            self.create_pr_btn.config(state=tk.NORMAL)
+        else:
+            self.create_pr_btn.config(state=tk.DISABLED)
+        
+        self.update_origin_summary()
+        self.refresh_origin_commits_display()
 
     def create_pull_request(self):
         """Create a pull request from fork to parent"""
@@ -1083,10 +1601,6 @@ class GitHubCompare:
         # Initial focus
         title_entry.focus_set()
 
-
-
-
-
     def setup_commit_list_tab(self):
         # Create frames for organization
         top_frame = ttk.Frame(self.commit_list_tab)
@@ -1177,232 +1691,35 @@ class GitHubCompare:
         def fetch_branches():
             try:
                 # Check if branches are cached
-                if repo_name in self.cache['branches']:
-                    branches = self.cache['branches'][repo_name]
-                else:
-                    repo = self.g.get_repo(repo_name)
-                    branches = [branch.name for branch in repo.get_branches()]
-                    self.cache['branches'][repo_name] = branches
+                repo = self.get_repo(repo_name)
+                branches = self.get_cached_branches(repo_name)
+                if branches is None:
+                    branches = self._fetch_branch_names(repo_name)
+                    self.set_cached_branches(repo_name, branches)
                     self.save_cache()
                 
-                # Update UI in main thread
-                self.root.after(0, lambda: self.update_commit_list_branch_dropdown(branches, repo_name))
+                return branches, repo.default_branch
                 
             except Exception as e:
                 raise Exception(f"Failed to fetch branches: {str(e)}")
         
         # Run in background thread
         self.run_in_thread(fetch_branches, message=f"Fetching branches for {repo_name}...", 
-                        success_message=f"Branches updated for {repo_name}")
+                        success_message=f"Branches updated for {repo_name}",
+                        on_done=self.update_commit_list_branch_dropdown)
 
-    def update_commit_list_branch_dropdown(self, branches, repo_name):
+    def update_commit_list_branch_dropdown(self, result):
         """Update branch dropdown in commit list tab"""
+        branches, default_branch = result
         self.commit_list_branch_combo['values'] = branches
         
         # Try to set to develop branch if exists, otherwise default branch
         if 'develop' in branches:
             self.commit_list_branch_var.set('develop')
-        else:
-            try:
-                default_branch = self.g.get_repo(repo_name).default_branch
-                self.commit_list_branch_var.set(default_branch)
-            except:
-                if branches:
-                    self.commit_list_branch_var.set(branches[0])
-
-    def display_commit_list(self, commits, repo_name, branch_name):
-        """Display commits with checkboxes in the commit list tab"""
-        # Clear previous results
-        for widget in self.commit_list_frame.winfo_children():
-            widget.destroy()
-            
-        if not commits:
-            self.commit_list_status_var.set(f"No commits found in {repo_name}/{branch_name}")
-            return
-            
-        self.commit_list_status_var.set(f"Showing {len(commits)} commits from {repo_name}/{branch_name}")
-        
-        # Store checkboxes for later access
-        self.commit_checkboxes = {}
-        
-        # Create header
-        header_frame = ttk.Frame(self.commit_list_frame)
-        header_frame.pack(fill=tk.X, padx=5, pady=5)
-        
-        # Select all checkbox
-        self.select_all_var = tk.BooleanVar(value=False)
-        select_all_cb = ttk.Checkbutton(header_frame, variable=self.select_all_var, command=self.toggle_all_commits)
-        select_all_cb.pack(side=tk.LEFT, padx=5)
-        
-        ttk.Label(header_frame, text="Select All", font=("", 10, "bold")).pack(side=tk.LEFT)
-        
-        # Add separators for header
-        separator = ttk.Separator(self.commit_list_frame, orient=tk.HORIZONTAL)
-        separator.pack(fill=tk.X, padx=5, pady=5)
-        
-        # Create a frame for each commit
-        for i, commit in enumerate(commits):
-            commit_frame = ttk.Frame(self.commit_list_frame)
-            commit_frame.pack(fill=tk.X, padx=5, pady=5, anchor=tk.N)
-            
-            # Checkbox for selection
-            var = tk.BooleanVar(value=False)
-            checkbox = ttk.Checkbutton(commit_frame, variable=var)
-            checkbox.pack(side=tk.LEFT, padx=5)
-            
-            # Store the checkbox variable
-            self.commit_checkboxes[commit.sha] = var
-            
-            # Commit number and hash
-            commit_num = ttk.Label(commit_frame, text=f"#{i+1}", font=("", 10, "bold"))
-            commit_num.pack(side=tk.LEFT, padx=5)
-            
-            commit_hash = ttk.Label(commit_frame, text=commit.sha[:7])
-            commit_hash.pack(side=tk.LEFT, padx=5)
-            
-            # Commit message
-            msg_text = commit.commit.message.split('\n')[0]
-            commit_msg = ttk.Label(commit_frame, text=msg_text, wraplength=800, anchor=tk.W)
-            commit_msg.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
-            
-            # Author and date
-            author = commit.commit.author.name
-            date = commit.commit.author.date.strftime("%Y-%m-%d %H:%M:%S")
-            
-            info_frame = ttk.Frame(commit_frame)
-            info_frame.pack(side=tk.RIGHT)
-            
-            author_label = ttk.Label(info_frame, text=f"{author} on {date}")
-            author_label.pack(side=tk.RIGHT, padx=5)
-            
-            # Add separator after each commit
-            if i < len(commits) - 1:
-                separator = ttk.Separator(self.commit_list_frame, orient=tk.HORIZONTAL)
-                separator.pack(fill=tk.X, padx=5, pady=5)
-
-
-    def setup_commit_list_tab(self):
-        # Create frames for organization
-        top_frame = ttk.Frame(self.commit_list_tab)
-        top_frame.pack(fill=tk.X, padx=5, pady=5)
-        
-        # Repository selection
-        repo_frame = ttk.LabelFrame(top_frame, text="Repository Selection")
-        repo_frame.pack(fill=tk.X, padx=5, pady=5)
-        
-        ttk.Label(repo_frame, text="Repository:").pack(side=tk.LEFT, padx=5)
-        self.commit_list_repo_var = tk.StringVar()
-        self.commit_list_repo_combo = ttk.Combobox(repo_frame, textvariable=self.commit_list_repo_var, width=50)
-        self.commit_list_repo_combo.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
-        self.commit_list_repo_combo.bind('<<ComboboxSelected>>', self.update_commit_list_branches)
-        
-        # Branch selection
-        branch_frame = ttk.LabelFrame(top_frame, text="Branch Selection")
-        branch_frame.pack(fill=tk.X, padx=5, pady=5)
-        
-        ttk.Label(branch_frame, text="Branch:").pack(side=tk.LEFT, padx=5)
-        self.commit_list_branch_var = tk.StringVar()
-        self.commit_list_branch_combo = ttk.Combobox(branch_frame, textvariable=self.commit_list_branch_var, width=30)
-        self.commit_list_branch_combo.pack(side=tk.LEFT, padx=5)
-        
-        # Action buttons
-        action_frame = ttk.Frame(top_frame)
-        action_frame.pack(fill=tk.X, padx=5, pady=5)
-        
-        fetch_btn = ttk.Button(action_frame, text="Fetch Commits", command=self.fetch_commit_list)
-        fetch_btn.pack(side=tk.LEFT, padx=5)
-        
-        remove_btn = ttk.Button(action_frame, text="Remove Selected Commits", command=self.remove_selected_commits)
-        remove_btn.pack(side=tk.LEFT, padx=5)
-        
-        # Number of commits to show
-        limit_frame = ttk.Frame(action_frame)
-        limit_frame.pack(side=tk.LEFT, padx=15)
-        
-        ttk.Label(limit_frame, text="Show last:").pack(side=tk.LEFT, padx=5)
-        self.commit_limit_var = tk.StringVar(value="20")
-        limit_entry = ttk.Combobox(limit_frame, textvariable=self.commit_limit_var, width=5, 
-                                values=["10", "20", "50", "100"])
-        limit_entry.pack(side=tk.LEFT, padx=5)
-        ttk.Label(limit_frame, text="commits").pack(side=tk.LEFT)
-        
-        # Results frame with commits list
-        results_frame = ttk.LabelFrame(self.commit_list_tab, text="Commit List")
-        results_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Create a frame for the commits with a scrollbar
-        commits_frame = ttk.Frame(results_frame)
-        commits_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Create canvas and scrollbar for scrolling
-        self.commit_list_canvas = tk.Canvas(commits_frame)
-        scrollbar = ttk.Scrollbar(commits_frame, orient=tk.VERTICAL, command=self.commit_list_canvas.yview)
-        self.commit_list_canvas.configure(yscrollcommand=scrollbar.set)
-        
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.commit_list_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Frame inside canvas for commits
-        self.commit_list_frame = ttk.Frame(self.commit_list_canvas)
-        self.commit_list_canvas_window = self.commit_list_canvas.create_window((0, 0), window=self.commit_list_frame, anchor=tk.NW)
-        
-        # Configure scrolling
-        self.commit_list_frame.bind("<Configure>", lambda e: self.commit_list_canvas.configure(scrollregion=self.commit_list_canvas.bbox("all")))
-        self.commit_list_canvas.bind("<Configure>", self.on_commit_list_canvas_configure)
-        
-        # Bind mousewheel scrolling
-        self.commit_list_canvas.bind_all("<MouseWheel>", lambda event: self.commit_list_canvas.yview_scroll(int(-1*(event.delta/120)), "units"))
-        
-        # Status message
-        self.commit_list_status_var = tk.StringVar(value="Select a repository and branch to view commits")
-        status_label = ttk.Label(results_frame, textvariable=self.commit_list_status_var)
-        status_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
-
-    def on_commit_list_canvas_configure(self, event):
-        # Update the width of the canvas window when the canvas size changes
-        self.commit_list_canvas.itemconfig(self.commit_list_canvas_window, width=event.width)
-
-    def update_commit_list_branches(self, event=None):
-        """Update branch list when repository is selected in commit list tab"""
-        repo_name = self.commit_list_repo_var.get()
-        if not repo_name:
-            return
-            
-        def fetch_branches():
-            try:
-                # Check if branches are cached
-                if repo_name in self.cache['branches']:
-                    branches = self.cache['branches'][repo_name]
-                else:
-                    repo = self.g.get_repo(repo_name)
-                    branches = [branch.name for branch in repo.get_branches()]
-                    self.cache['branches'][repo_name] = branches
-                    self.save_cache()
-                
-                # Update UI in main thread
-                self.root.after(0, lambda: self.update_commit_list_branch_dropdown(branches, repo_name))
-                
-            except Exception as e:
-                raise Exception(f"Failed to fetch branches: {str(e)}")
-        
-        # Run in background thread
-        self.run_in_thread(fetch_branches, message=f"Fetching branches for {repo_name}...", 
-                        success_message=f"Branches updated for {repo_name}")
-
-    def update_commit_list_branch_dropdown(self, branches, repo_name):
-        """Update branch dropdown in commit list tab"""
-        self.commit_list_branch_combo['values'] = branches
-        
-        # Try to set to develop branch if exists, otherwise default branch
-        if 'develop' in branches:
-            self.commit_list_branch_var.set('develop')
-        else:
-            try:
-                default_branch = self.g.get_repo(repo_name).default_branch
-                self.commit_list_branch_var.set(default_branch)
-            except:
-                if branches:
-                    self.commit_list_branch_var.set(branches[0])
+        elif default_branch:
+            self.commit_list_branch_var.set(default_branch)
+        elif branches:
+            self.commit_list_branch_var.set(branches[0])
 
     def fetch_commit_list(self):
         """Fetch commit list from the selected branch"""
@@ -1420,21 +1737,17 @@ class GitHubCompare:
         
         def fetch_commits():
             try:
-                repo = self.g.get_repo(repo_name)
-                branch = repo.get_branch(branch_name)
+                repo = self.get_repo(repo_name)
                 
-                # Get commits from the branch
+                # Get commits from the branch; the commits endpoint resolves the
+                # branch name itself, so the branch is not looked up separately
                 commits = []
-                for commit in repo.get_commits(sha=branch.commit.sha):
+                for commit in repo.get_commits(sha=branch_name):
                     commits.append(commit)
                     if len(commits) >= limit:
                         break
                 
-                # Store commits for later use
-                self.commit_list_commits = commits
-                
-                # Update UI in main thread
-                self.root.after(0, lambda: self.display_commit_list(commits, repo_name, branch_name))
+                return commits
                 
             except Exception as e:
                 raise Exception(f"Failed to fetch commits: {str(e)}")
@@ -1442,10 +1755,14 @@ class GitHubCompare:
         # Run in background thread
         self.run_in_thread(fetch_commits, 
                         message=f"Fetching commits from {branch_name}...", 
-                        success_message=f"Fetched commits from {branch_name}")
+                        success_message=f"Fetched commits from {branch_name}",
+                        on_done=partial(self.display_commit_list, repo_name=repo_name, branch_name=branch_name))
 
     def display_commit_list(self, commits, repo_name, branch_name):
         """Display commits with checkboxes in the commit list tab"""
+        # Store commits for later use
+        self.commit_list_commits = commits
+        
         # Clear previous results
         for widget in self.commit_list_frame.winfo_children():
             widget.destroy()
@@ -1522,280 +1839,528 @@ class GitHubCompare:
             var.set(select_all)
 
     def remove_selected_commits(self):
-    """Remove selected commits from the branch with improved error handling and fallback methods"""
-    repo_name = self.commit_list_repo_var.get()
-    branch_name = self.commit_list_branch_var.get()
+        """Remove selected commits from the branch with improved error handling and fallback methods"""
+        repo_name = self.commit_list_repo_var.get()
+        branch_name = self.commit_list_branch_var.get()
     
-    if not repo_name or not branch_name:
-        messagebox.showerror("Error", "Please select a repository and branch")
-        return
+        if not repo_name or not branch_name:
+            messagebox.showerror("Error", "Please select a repository and branch")
+            return
         
-    # Get selected commits
-    selected_commits = [sha for sha, var in self.commit_checkboxes.items() if var.get()]
+        # Get selected commits
+        selected_commits = [sha for sha, var in self.commit_checkboxes.items() if var.get()]
     
-    if not selected_commits:
-        messagebox.showinfo("Information", "No commits selected for removal")
-        return
+        if not selected_commits:
+            messagebox.showinfo("Information", "No commits selected for removal")
+            return
     
-    # Confirmation dialog
-    response = messagebox.askyesno(
-        "Confirm Commit Removal", 
-        f"Are you sure you want to remove {len(selected_commits)} commits from {branch_name}?
-
-"
-        "This operation will rewrite the branch history and cannot be undone."
-    )
+        # Confirmation dialog
+        response = messagebox.askyesno(
+            "Confirm Commit Removal", 
+            f"Are you sure you want to remove {len(selected_commits)} commits from {branch_name}?\n\n"
+            "This operation will rewrite the branch history and cannot be undone."
+        )
     
-    if not response:
-        return
+        if not response:
+            return
     
-    def perform_removal():
-        logger.info(f"Starting commit removal process for {len(selected_commits)} commits from {branch_name}")
+        def perform_removal():
+            logger.info(f"Starting commit removal process for {len(selected_commits)} commits from {branch_name}")
         
-        # Track failed commits for retry
-        failed_commits = []
-        success = False
-        error_message = ""
+            # Set for constant-time membership checks while filtering branch history
+            commits_to_remove = frozenset(selected_commits)
+        
+            # Track failed commits for retry
+            failed_commits = []
+            success = False
+            error_message = ""
         
-        try:
-            # Method 1: GitHub API approach
-            logger.info("Attempting commit removal using GitHub API")
-            success = self._remove_commits_api_method(repo_name, branch_name, selected_commits)
-            
-        except Exception as e:
-            error_message = str(e)
-            logger.error(f"GitHub API method failed: {error_message}")
-            failed_commits = selected_commits
-            
             try:
-                # Method 2: Git filter-branch fallback
-                logger.info("Attempting commit removal using git filter-branch fallback")
-                success = self._remove_commits_filter_branch(repo_name, branch_name, failed_commits)
-                failed_commits = []
-                
-            except Exception as e2:
-                error_message = f"{error_message}
-Filter-branch fallback failed: {str(e2)}"
-                logger.error(f"Filter-branch fallback failed: {str(e2)}")
-                
+                # Method 1: GitHub API approach
+                logger.info("Attempting commit removal using GitHub API")
+                success = self._remove_commits_api_method(repo_name, branch_name, commits_to_remove)
+        
+            # CancelledError is an Exception too; closing the app must not start
+            # a fallback that clones and force-pushes after the window is gone
+            except concurrent.futures.CancelledError:
+                raise
+            except Exception as e:
+                error_message = str(e)
+                logger.error(f"GitHub API method failed: {error_message}")
+                failed_commits = selected_commits
+        
                 try:
-                    # Method 3: Cherry-pick fallback
-                    logger.info("Attempting commit removal using cherry-pick fallback")
-                    success = self._remove_commits_cherry_pick(repo_name, branch_name, failed_commits)
+                    # Method 2: Git filter-branch fallback
+                    self._wait_or_cancel(0)
+                    logger.info("Attempting commit removal using git filter-branch fallback")
+                    success = self._remove_commits_filter_branch(repo_name, branch_name, commits_to_remove)
                     failed_commits = []
-                    
-                except Exception as e3:
-                    error_message = f"{error_message}
-Cherry-pick fallback failed: {str(e3)}"
-                    logger.error(f"Cherry-pick fallback failed: {str(e3)}")
-        
-        # Update UI in main thread
-        if success:
-            self.root.after(0, lambda: self.after_commit_removal(len(selected_commits)))
-            logger.info(f"Successfully removed {len(selected_commits)} commits")
-        else:
-            if failed_commits:
-                error_msg = f"Failed to remove commits: {failed_commits}
-Error details: {error_message}"
-                logger.error(error_msg)
-                self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
+            
+                except concurrent.futures.CancelledError:
+                    raise
+                except Exception as e2:
+                    error_message = f"{error_message}\nFilter-branch fallback failed: {str(e2)}"
+                    logger.error(f"Filter-branch fallback failed: {str(e2)}")
+            
+                    try:
+                        # Method 3: Cherry-pick fallback
+                        self._wait_or_cancel(0)
+                        logger.info("Attempting commit removal using cherry-pick fallback")
+                        success = self._remove_commits_cherry_pick(repo_name, branch_name, commits_to_remove)
+                        failed_commits = []
+                
+                    except concurrent.futures.CancelledError:
+                        raise
+                    except Exception as e3:
+                        error_message = f"{error_message}\nCherry-pick fallback failed: {str(e3)}"
+                        logger.error(f"Cherry-pick fallback failed: {str(e3)}")
+        
+            # Update UI in main thread
+            if success:
+                self.root.after(0, self.after_commit_removal, len(selected_commits))
+                logger.info(f"Successfully removed {len(selected_commits)} commits")
             else:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to remove commits: {error_message}"))
-    
-    # Run in background thread
-    self.run_in_thread(perform_removal, 
-                    message=f"Removing {len(selected_commits)} commits...", 
-                    success_message=f"Successfully removed {len(selected_commits)} commits")
-
-def _remove_commits_api_method(self, repo_name, branch_name, commits_to_remove):
-    """Remove commits using the GitHub API method"""
-    logger.info(f"Using GitHub API method to remove {len(commits_to_remove)} commits")
+                if failed_commits:
+                    error_msg = f"Failed to remove commits: {failed_commits}\nError details: {error_message}"
+                    logger.error(error_msg)
+                    self.root.after(0, messagebox.showerror, "Error", error_msg)
+                else:
+                    self.root.after(0, messagebox.showerror, "Error", f"Failed to remove commits: {error_message}")
     
-    repo = self.g.get_repo(repo_name)
+        # Run in background thread
+        self.run_in_thread(perform_removal, 
+                        message=f"Removing {len(selected_commits)} commits...", 
+                        success_message=f"Successfully removed {len(selected_commits)} commits")
+
+    def _remove_commits_api_method(self, repo_name, branch_name, commits_to_remove):
+        """Remove commits using the GitHub API method"""
+        logger.info(f"Using GitHub API method to remove {len(commits_to_remove)} commits")
     
-    # Get the current branch reference
-    branch_ref = repo.get_git_ref(f"heads/{branch_name}")
+        repo = self.get_repo(repo_name)
     
-    # Create a temporary branch for the operation
-    temp_branch_name = f"temp-remove-commits-{int(datetime.datetime.now().timestamp())}"
-    logger.info(f"Creating temporary branch: {temp_branch_name}")
+        # Get the current branch reference
+        branch_ref = repo.get_git_ref(f"heads/{branch_name}")
     
-    try:
-        temp_ref = repo.create_git_ref(f"refs/heads/{temp_branch_name}", branch_ref.object.sha)
-        
-        # Get all commits in chronological order
-        logger.info(f"Fetching all commits from {branch_name}")
-        all_commits = list(repo.get_commits(sha=branch_name))
+        try:
+            # Get the SHAs of all commits, newest first
+            logger.info(f"Fetching all commits from {branch_name}")
+            all_shas = self._fetch_branch_history(repo_name, branch_name)
         
-        # Filter out selected commits to remove
-        commits_to_keep = [c for c in all_commits if c.sha not in commits_to_remove]
+            # Filter out selected commits to remove
+            commits_to_keep = [sha for sha in all_shas if sha not in commits_to_remove]
         
-        if not commits_to_keep:
-            raise Exception("Cannot remove all commits from the branch")
+            if not commits_to_keep:
+                raise Exception("Cannot remove all commits from the branch")
             
-        # Find the oldest commit to keep
-        base_commit = commits_to_keep[-1]
-        logger.info(f"Base commit for new history: {base_commit.sha[:7]}")
+            # Find the oldest commit to keep
+            base_sha = commits_to_keep[-1]
+            logger.info(f"Base commit for new history: {base_sha[:7]}")
         
-        # Hard reset to the base commit
-        logger.info(f"Resetting temporary branch to base commit")
-        temp_ref.edit(base_commit.sha, force=True)
+            # Fetch message and tree of all commits to keep up front in batched GraphQL
+            # queries, instead of one request per commit
+            logger.info(f"Fetching data for {len(commits_to_keep)-1} commits")
+            prefetched = self._fetch_commit_data(repo_name, commits_to_keep[:-1])
         
-        # Cherry-pick each commit to keep in reverse order (oldest to newest)
-        logger.info(f"Cherry-picking {len(commits_to_keep)-1} commits to temporary branch")
+            # Cherry-pick each commit to keep in reverse order (oldest to newest). The new
+            # commits are chained by SHA in memory; no ref points at them until the end
+            logger.info(f"Cherry-picking {len(commits_to_keep)-1} commits")
         
-        for i, commit in enumerate(reversed(commits_to_keep[:-1])):  # Skip the base commit
-            logger.info(f"Processing commit {i+1}/{len(commits_to_keep)-1}: {commit.sha[:7]}")
+            # Each new commit's SHA depends on its parent's, so the chain is inherently
+            # sequential and cannot be spread over several workers
+            for i, sha in enumerate(reversed(commits_to_keep[:-1])):  # Skip the base commit
+                logger.info(f"Creating commit {i+1}/{len(commits_to_keep)-1} based on {sha[:7]}")
+                commit_data = prefetched[sha]
+                new_sha = self._create_git_commit(repo, commit_data["message"], commit_data["tree"], [base_sha])
             
-            # Get the commit data
-            commit_data = repo.get_git_commit(commit.sha)
-            tree = commit_data.tree
-            parents = [base_commit.sha]
+                # The new commit is the parent of the next one; the create response already
+                # carries its SHA, so there is no need to fetch it back
+                base_sha = new_sha
             
-            # Create a new commit with the same data
-            logger.info(f"Creating new commit based on {commit.sha[:7]}")
-            new_commit = repo.create_git_commit(
-                message=commit_data.message,
-                tree=tree,
-                parents=parents
-            )
-            
-            # Update the temp branch reference
-            temp_ref.edit(new_commit.sha, force=True)
-            
-            # Update the base commit for the next iteration
-            base_commit = repo.get_git_commit(new_commit.sha)
-            
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.5)
+                # Only slow down when the rate limit is close to exhausted
+                self._adaptive_throttle()
         
-        # Update the original branch to point to the new history
-        logger.info(f"Updating original branch {branch_name} to new history")
-        branch_ref.edit(temp_ref.object.sha, force=True)
-        
-        # Delete the temporary branch
-        logger.info(f"Cleaning up temporary branch")
-        temp_ref.delete()
-        
-        return True
+            # Update the original branch to point to the new history in a single ref update
+            logger.info(f"Updating original branch {branch_name} to new history")
+            branch_ref.edit(base_sha, force=True)
         
-    except Exception as e:
-        logger.error(f"Error in API method: {str(e)}")
-        # Try to clean up the temporary branch if it exists
-        try:
-            repo.get_git_ref(f"heads/{temp_branch_name}").delete()
-        except:
-            pass
-        raise e
-
-def _remove_commits_filter_branch(self, repo_name, branch_name, commits_to_remove):
-    """Remove commits using git filter-branch as a fallback method"""
-    logger.info(f"Using git filter-branch method to remove {len(commits_to_remove)} commits")
-    
-    # Create a temporary directory for the operation
-    with tempfile.TemporaryDirectory() as temp_dir:
-        try:
-            # Clone the repository
-            repo_url = f"https://{self.github_token}@github.com/{repo_name}.git"
-            logger.info(f"Cloning repository to temporary directory")
-            subprocess.run(["git", "clone", repo_url, temp_dir], check=True, capture_output=True)
-            
-            # Change to the repository directory
-            os.chdir(temp_dir)
-            
-            # Checkout the branch
-            logger.info(f"Checking out branch: {branch_name}")
-            subprocess.run(["git", "checkout", branch_name], check=True, capture_output=True)
-            
-            # Create a list of commit SHAs to remove
-            commit_list = " ".join(commits_to_remove)
-            
-            # Use git filter-branch to remove the commits
-            logger.info(f"Running git filter-branch to remove commits")
-            filter_cmd = f"git filter-branch --force --commit-filter 'if echo $GIT_COMMIT | grep -q -e {commit_list}; then skip_commit \"$@\"; else git commit-tree \"$@\"; fi' HEAD"
-            subprocess.run(filter_cmd, shell=True, check=True, capture_output=True)
-            
-            # Push the changes
-            logger.info(f"Pushing changes to remote")
-            subprocess.run(["git", "push", "--force", "origin", branch_name], check=True, capture_output=True)
-            
             return True
-            
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Subprocess error in filter-branch method: {e.stderr.decode()}")
-            raise Exception(f"Git operation failed: {e.stderr.decode()}")
+        
         except Exception as e:
-            logger.error(f"Error in filter-branch method: {str(e)}")
+            logger.error(f"Error in API method: {str(e)}")
             raise e
 
-def _remove_commits_cherry_pick(self, repo_name, branch_name, commits_to_remove):
-    """Remove commits using cherry-pick as a fallback method"""
-    logger.info(f"Using cherry-pick method to remove {len(commits_to_remove)} commits")
-    
-    # Create a temporary directory for the operation
-    with tempfile.TemporaryDirectory() as temp_dir:
-        try:
-            # Clone the repository
-            repo_url = f"https://{self.github_token}@github.com/{repo_name}.git"
-            logger.info(f"Cloning repository to temporary directory")
-            subprocess.run(["git", "clone", repo_url, temp_dir], check=True, capture_output=True)
-            
-            # Change to the repository directory
-            os.chdir(temp_dir)
-            
-            # Get all commits in the branch
-            logger.info(f"Getting commit history")
-            result = subprocess.run(["git", "log", "--format=%H", branch_name], check=True, capture_output=True, text=True)
-            all_commits = result.stdout.strip().split('
-')
-            
-            # Filter out commits to remove
-            commits_to_keep = [c for c in all_commits if c not in commits_to_remove]
-            
-            if not commits_to_keep:
-                raise Exception("Cannot remove all commits from the branch")
-            
-            # Create a new branch from the earliest commit to keep
-            earliest_commit = commits_to_keep[-1]
-            temp_branch = f"temp-remove-{int(datetime.datetime.now().timestamp())}"
-            logger.info(f"Creating temporary branch from {earliest_commit[:7]}")
-            subprocess.run(["git", "checkout", "-b", temp_branch, earliest_commit], check=True, capture_output=True)
-            
-            # Cherry-pick each commit to keep
-            logger.info(f"Cherry-picking {len(commits_to_keep)-1} commits")
-            for i, commit in enumerate(reversed(commits_to_keep[:-1])):
-                logger.info(f"Cherry-picking commit {i+1}/{len(commits_to_keep)-1}: {commit[:7]}")
-                try:
-                    subprocess.run(["git", "cherry-pick", commit], check=True, capture_output=True)
-                except subprocess.CalledProcessError:
-                    # Handle cherry-pick conflicts
-                    logger.warning(f"Cherry-pick conflict for commit {commit[:7]}, skipping")
-                    subprocess.run(["git", "cherry-pick", "--abort"], check=False)
+    def _adaptive_throttle(self):
+        """Pause based on the rate limit reported by the last API response"""
+        remaining, _ = self.g.rate_limiting
+        if remaining > RATE_LIMIT_SLOWDOWN:
+            return
             
-            # Force update the original branch
-            logger.info(f"Updating original branch {branch_name}")
-            subprocess.run(["git", "branch", "-f", branch_name, temp_branch], check=True, capture_output=True)
+        if remaining < RATE_LIMIT_PAUSE:
+            wait = self.g.rate_limiting_resettime - time.time()
+            if wait > 0:
+                logger.info(f"Rate limit nearly exhausted, waiting {int(wait)}s for reset")
+                self._wait_or_cancel(wait)
+        else:
+            self._wait_or_cancel(0.5)
+
+    def _wait_or_cancel(self, seconds):
+        """Sleep for up to seconds, raising CancelledError as soon as the app shuts down"""
+        if self.cancel_event.wait(seconds):
+            raise concurrent.futures.CancelledError("Cancelled because the application is closing")
+
+    def _graphql(self, query, variables=None):
+        """Run a GraphQL query with the client's credentials and return its data"""
+        _, result = self.g._Github__requester.requestJsonAndCheck(
+            "POST", "/graphql", input={"query": query, "variables": variables or {}})
+        if result.get("errors"):
+            raise Exception(f"GraphQL query failed: {result['errors'][0].get('message')}")
+        return result["data"]
+
+    def _fetch_branch_history(self, repo_name, branch_name):
+        """Fetch the SHAs of all commits reachable from a branch, newest first"""
+        owner, name = repo_name.split("/", 1)
+        query = """
+            query($owner: String!, $name: String!, $ref: String!, $cursor: String) {
+              repository(owner: $owner, name: $name) {
+                ref(qualifiedName: $ref) {
+                  target {
+                    ... on Commit {
+                      history(first: 100, after: $cursor) {
+                        nodes { oid }
+                        pageInfo { hasNextPage endCursor }
+                      }
+                    }
+                  }
+                }
+              }
+            }
+        """
+        shas = []
+        cursor = None
+        
+        while True:
+            data = self._graphql(query, {"owner": owner, "name": name,
+                                         "ref": f"refs/heads/{branch_name}", "cursor": cursor})
+            ref = data["repository"]["ref"]
+            if ref is None:
+                raise Exception(f"Branch {branch_name} not found in {repo_name}")
+                
+            history = ref["target"]["history"]
+            shas.extend(node["oid"] for node in history["nodes"])
             
-            # Push the changes
-            logger.info(f"Pushing changes to remote")
-            subprocess.run(["git", "push", "--force", "origin", branch_name], check=True, capture_output=True)
+            if not history["pageInfo"]["hasNextPage"]:
+                return shas
+            cursor = history["pageInfo"]["endCursor"]
+
+    def _fetch_commit_data(self, repo_name, shas):
+        """Fetch message and tree SHA for many commits, keyed by commit SHA
+        
+        A SHA always names the same content, so commits seen by an earlier removal
+        are answered from memory and only new ones are queried.
+        """
+        owner, name = repo_name.split("/", 1)
+        commit_data = {sha: self._commit_data[sha] for sha in shas if sha in self._commit_data}
+        shas = [sha for sha in shas if sha not in commit_data]
+        
+        for start in range(0, len(shas), GRAPHQL_BATCH_SIZE):
+            batch = shas[start:start + GRAPHQL_BATCH_SIZE]
+            fields = " ".join(
+                f'c{i}: object(oid: "{sha}") {{ ... on Commit {{ message tree {{ oid }} }} }}'
+                for i, sha in enumerate(batch))
+            data = self._graphql(
+                f"query($owner: String!, $name: String!) {{ repository(owner: $owner, name: $name) {{ {fields} }} }}",
+                {"owner": owner, "name": name})
+            
+            for i, sha in enumerate(batch):
+                node = data["repository"][f"c{i}"]
+                commit_data[sha] = {"message": node["message"], "tree": node["tree"]["oid"]}
+                self._commit_data[sha] = commit_data[sha]
+        
+        return commit_data
+
+    def _create_git_commit(self, repo, message, tree_sha, parent_shas):
+        """Create a commit object from raw SHAs and return the new commit's SHA"""
+        # Repository.create_git_commit only accepts GitTree/GitCommit objects, which
+        # would cost an extra request each
+        _, data = repo._requester.requestJsonAndCheck(
+            "POST", f"{repo.url}/git/commits",
+            input={"message": message, "tree": tree_sha, "parents": parent_shas})
+        return data["sha"]
+
+    def _remove_commits_filter_branch(self, repo_name, branch_name, commits_to_remove):
+        """Remove commits by rewriting history locally as a fallback method
+        
+        Rewrites the branch with git fast-import, falling back to git filter-branch
+        when a commit to remove is not on the first-parent chain. Both skip the
+        commits but keep the later commits' snapshots, like the API method, so
+        the removed commits' changes stay in the tree.
+        """
+        logger.info(f"Using git filter-branch method to remove {len(commits_to_remove)} commits")
+    
+        # Create a temporary directory for the operation
+        with tempfile.TemporaryDirectory() as temp_dir:
+            try:
+                self._clone_branch(repo_name, branch_name, temp_dir)
             
+                if self._drop_commits_with_fast_import(temp_dir, branch_name, commits_to_remove):
+                    logger.info("Rewrote branch with git fast-import")
+                else:
+                    # Write the SHAs to remove to a file so each commit is checked with one
+                    # fixed-string grep instead of a pipeline with a pattern per SHA
+                    shas_file = os.path.join(temp_dir, ".git", "shas-to-remove")
+                    with open(shas_file, "w") as f:
+                        f.write("\n".join(commits_to_remove) + "\n")
+                    filter_script = ('if grep -qxF "$GIT_COMMIT" "$SHAS_FILE"; '
+                                     'then skip_commit "$@"; else git commit-tree "$@"; fi')
+                
+                    # Use git filter-branch to remove the commits; passing argv directly
+                    # avoids an extra shell, and the env var skips git's deprecation pause
+                    logger.info(f"Running git filter-branch to remove commits")
+                    subprocess.run([GIT, "filter-branch", "--force", "--commit-filter", filter_script, "HEAD"],
+                                   env={**os.environ, "FILTER_BRANCH_SQUELCH_WARNING": "1", "SHAS_FILE": shas_file},
+                                   check=True, capture_output=True, cwd=temp_dir)
+            
+                # Push the changes
+                logger.info(f"Pushing changes to remote")
+                subprocess.run([GIT, "push", "--force", "origin", branch_name], check=True, capture_output=True, cwd=temp_dir,
+                               env=self._git_env())
+            
+                return True
+            
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Subprocess error in filter-branch method: {e.stderr.decode()}")
+                raise Exception(f"Git operation failed: {e.stderr.decode()}")
+            except Exception as e:
+                logger.error(f"Error in filter-branch method: {str(e)}")
+                raise e
+
+    def _clone_branch(self, repo_name, branch_name, temp_dir):
+        """Clone only the given branch into temp_dir, borrowing objects from the clone cache
+        
+        Only objects missing from the cache are downloaded, and the cache then takes the
+        new ones from the clone, so the next removal starts warm instead of cloning from
+        scratch. Forks share the cache of their network's root repository, since they
+        mostly hold the same objects.
+        """
+        # The URL carries no secret; git asks _git_env's askpass script for the token
+        repo_url = f"https://x-access-token@github.com/{repo_name}.git"
+        source = self.get_repo(repo_name).source
+        network = source.full_name if source else repo_name
+        cache_dir = os.path.join(CLONE_CACHE_DIR, hashlib.sha256(network.encode()).hexdigest())
+        env = self._git_env()  # Also creates CLONE_CACHE_DIR
+        
+        with self._clone_cache_lock:
+            if not os.path.isdir(cache_dir):
+                subprocess.run([GIT, "init", "--bare", "--quiet", cache_dir], check=True, capture_output=True)
+        
+        logger.info(f"Cloning branch {branch_name} to temporary directory")
+        subprocess.run([GIT, "clone", "--reference", cache_dir, "--single-branch", "--no-tags",
+                        "--branch", branch_name, repo_url, temp_dir],
+                       check=True, capture_output=True, env=env)
+        
+        # A local fetch, so the cache has no remote and needs no credentials. Refs are
+        # namespaced by repository so forks' branches of the same name do not clash
+        with self._clone_cache_lock:
+            subprocess.run([GIT, "fetch", "--no-tags", "--quiet", temp_dir,
+                            f"+refs/heads/{branch_name}:refs/repos/{repo_name}/{branch_name}"],
+                           check=True, capture_output=True, cwd=cache_dir)
+
+    def _git_env(self):
+        """Environment for git network calls that supplies the token through GIT_ASKPASS
+        
+        Keeps the token out of URLs, process arguments and the clone's config. Credential
+        helpers are disabled so the token is neither overridden nor stored by them.
+        The environment is built once per token and shared by later calls.
+        """
+        with self._clone_cache_lock:
+            env = self._git_environ
+            if env is not None and env["GITHUB_COMPARE_TOKEN"] == self.github_token:
+                return env
+                
+            askpass = os.path.join(CLONE_CACHE_DIR, "askpass.sh")
+            if not os.path.exists(askpass):
+                os.makedirs(CLONE_CACHE_DIR, exist_ok=True)
+                with open(askpass, "w") as f:
+                    f.write('#!/bin/sh\nprintf "%s\\n" "$GITHUB_COMPARE_TOKEN"\n')
+                os.chmod(askpass, 0o700)
+                
+            self._git_environ = {**os.environ,
+                                 "GIT_ASKPASS": askpass,
+                                 "GIT_TERMINAL_PROMPT": "0",
+                                 "GIT_CONFIG_COUNT": "2",
+                                 "GIT_CONFIG_KEY_0": "credential.helper",
+                                 "GIT_CONFIG_VALUE_0": "",
+                                 # Default only since git 2.26; v2 lets the server skip
+                                 # advertising refs outside the requested branch
+                                 "GIT_CONFIG_KEY_1": "protocol.version",
+                                 "GIT_CONFIG_VALUE_1": "2",
+                                 "GITHUB_COMPARE_TOKEN": self.github_token}
+            return self._git_environ
+
+    def _drop_commits_with_fast_import(self, repo_dir, branch_name, commits_to_remove):
+        """Rebuild the branch in repo_dir without the given commits through one git fast-import process
+        
+        Kept commits keep their own trees, as with filter-branch's skip_commit. Returns
+        False, leaving the branch untouched, unless every commit to remove is on the
+        branch's first-parent chain and none is reachable through a merged side branch,
+        whose commits are reused as they are.
+        """
+        result = subprocess.run([GIT, "log", "-z", "--first-parent", "--reverse", "--date=raw",
+                                 "--format=%H%x00%P%x00%T%x00%an <%ae> %ad%x00%cn <%ce> %cd%x00%B", "HEAD"],
+                                check=True, capture_output=True, cwd=repo_dir)
+        fields = result.stdout.split(b"\0")[:-1]
+        history = [fields[i:i + 6] for i in range(0, len(fields), 6)]
+        shas = [commit[0].decode() for commit in history]
+        
+        targets = [i for i, sha in enumerate(shas) if sha in commits_to_remove]
+        if len(targets) != len(commits_to_remove):
+            return False
+        
+        # Only the history after the oldest removed commit is streamed; everything
+        # before it is reused as is
+        first = targets[0]
+        side_parents = [sha.decode() for commit in history[first:] for sha in commit[1].split()[1:]]
+        if side_parents:
+            merged = subprocess.run([GIT, "rev-list", *side_parents], check=True, capture_output=True,
+                                    text=True, cwd=repo_dir)
+            if not commits_to_remove.isdisjoint(merged.stdout.split()):
+                return False
+        
+        stream = [b"feature done", b"reset refs/heads/" + branch_name.encode()]
+        parent = history[first][1].split()[0] if history[first][1] else None
+        if parent:
+            stream.append(b"from " + parent)
+        
+        for mark, (sha, parents, tree, author, committer, message) in enumerate(history[first:], 1):
+            if sha.decode() in commits_to_remove:
+                continue
+            stream += [b"commit refs/heads/" + branch_name.encode(), b"mark :%d" % mark,
+                       b"author " + author, b"committer " + committer, b"data %d" % len(message), message]
+            if parent:
+                stream.append(b"from " + parent)
+            stream += [b"merge " + sha_ for sha_ in parents.split()[1:]]
+            stream.append(b'M 040000 ' + tree + b' ""')
+            parent = b":%d" % mark
+        stream.append(b"done")
+        
+        logger.info(f"Streaming {len(history) - first - len(targets)} commits to git fast-import")
+        subprocess.run([GIT, "fast-import", "--quiet", "--force"], input=b"\n".join(stream) + b"\n",
+                       check=True, capture_output=True, cwd=repo_dir)
+        
+        # Never let the caller push a rewrite that still contains a removed commit
+        rewritten = subprocess.run([GIT, "rev-list", f"refs/heads/{branch_name}"], check=True, capture_output=True,
+                                   text=True, cwd=repo_dir)
+        if not commits_to_remove.isdisjoint(rewritten.stdout.split()):
+            raise Exception("Rewritten branch still contains commits to remove")
+        return True
+
+    def _remove_commits_cherry_pick(self, repo_name, branch_name, commits_to_remove):
+        """Remove commits using cherry-pick as a fallback method"""
+        logger.info(f"Using cherry-pick method to remove {len(commits_to_remove)} commits")
+    
+        # Create a temporary directory for the operation
+        with tempfile.TemporaryDirectory() as temp_dir:
+            try:
+                self._clone_branch(repo_name, branch_name, temp_dir)
+            
+                # Get all commits in the branch
+                logger.info(f"Getting commit history")
+                # rev-list is plumbing: one SHA per line, unaffected by log config or pager
+                result = subprocess.run([GIT, "rev-list", branch_name], check=True, capture_output=True, text=True, cwd=temp_dir)
+                all_commits = result.stdout.split()
+            
+                # Filter out commits to remove
+                commits_to_keep = [c for c in all_commits if c not in commits_to_remove]
+            
+                if not commits_to_keep:
+                    raise Exception("Cannot remove all commits from the branch")
+            
+                # Create a new branch from the earliest commit to keep
+                earliest_commit = commits_to_keep[-1]
+                temp_branch = f"temp-remove-{int(datetime.datetime.now().timestamp())}"
+                logger.info(f"Creating temporary branch from {earliest_commit[:7]}")
+                subprocess.run([GIT, "checkout", "-b", temp_branch, earliest_commit], check=True, capture_output=True, cwd=temp_dir)
+            
+                # Cherry-pick the commits to keep, one invocation per contiguous run
+                logger.info(f"Cherry-picking {len(commits_to_keep)-1} commits")
+                history = all_commits[:all_commits.index(earliest_commit)]
+                for run in self._contiguous_runs(reversed(history), commits_to_remove):
+                    logger.info(f"Cherry-picking {len(run)} commits: {run[0][:7]}..{run[-1][:7]}")
+                    result = subprocess.run([GIT, "cherry-pick", f"{run[0]}^..{run[-1]}"],
+                                            capture_output=True, cwd=temp_dir)
+                    
+                    # Handle cherry-pick conflicts by skipping only the conflicting commit
+                    for _ in run:
+                        if result.returncode == 0:
+                            break
+                        if not self._cherry_pick_skippable(temp_dir):
+                            # Any other failure, e.g. git could not create the commit, would
+                            # fail again for every later commit; skipping them all would push
+                            # a branch that lost them
+                            subprocess.run([GIT, "cherry-pick", "--abort"], check=False, capture_output=True, cwd=temp_dir)
+                            raise subprocess.CalledProcessError(result.returncode, result.args, stderr=result.stderr)
+                        logger.warning(f"Cherry-pick conflict in {run[0][:7]}..{run[-1][:7]}, skipping commit")
+                        result = subprocess.run([GIT, "cherry-pick", "--skip"], capture_output=True, cwd=temp_dir)
+                    else:
+                        if result.returncode != 0:
+                            subprocess.run([GIT, "cherry-pick", "--abort"], check=False, cwd=temp_dir)
+                            raise subprocess.CalledProcessError(result.returncode, result.args, stderr=result.stderr)
+            
+                # Force update the original branch
+                logger.info(f"Updating original branch {branch_name}")
+                subprocess.run([GIT, "branch", "-f", branch_name, temp_branch], check=True, capture_output=True, cwd=temp_dir)
+            
+                # Push the changes
+                logger.info(f"Pushing changes to remote")
+                subprocess.run([GIT, "push", "--force", "origin", branch_name], check=True, capture_output=True, cwd=temp_dir,
+                               env=self._git_env())
+            
+                return True
+            
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Subprocess error in cherry-pick method: {e.stderr.decode() if e.stderr else str(e)}")
+                raise Exception(f"Git operation failed: {e.stderr.decode() if e.stderr else str(e)}")
+            except Exception as e:
+                logger.error(f"Error in cherry-pick method: {str(e)}")
+                raise e
+
+    def _cherry_pick_skippable(self, repo_dir):
+        """Check whether a failed cherry-pick stopped on a conflict or on a commit that became empty"""
+        in_progress = subprocess.run([GIT, "rev-parse", "-q", "--verify", "CHERRY_PICK_HEAD"],
+                                     capture_output=True, cwd=repo_dir)
+        if in_progress.returncode != 0:
+            return False
+            
+        unmerged = subprocess.run([GIT, "ls-files", "--unmerged"], check=True, capture_output=True, cwd=repo_dir)
+        if unmerged.stdout:
             return True
             
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Subprocess error in cherry-pick method: {e.stderr.decode() if e.stderr else str(e)}")
-            raise Exception(f"Git operation failed: {e.stderr.decode() if e.stderr else str(e)}")
-        except Exception as e:
-            logger.error(f"Error in cherry-pick method: {str(e)}")
-            raise e
+        # Nothing staged means the commit's changes are already on the branch; staged
+        # changes without a conflict mean the pick failed for another reason
+        return subprocess.run([GIT, "diff", "--cached", "--quiet"], cwd=repo_dir).returncode == 0
 
-def after_commit_removal(self, num_removed):
-    """Update after commit removal"""
-    # Refresh the commit list
-    self.fetch_commit_list()
+    def _contiguous_runs(self, commits, commits_to_remove):
+        """Split commits (oldest first) into runs not interrupted by commits to remove"""
+        runs = []
+        current = []
+        for sha in commits:
+            if sha in commits_to_remove:
+                if current:
+                    runs.append(current)
+                current = []
+            else:
+                current.append(sha)
+        if current:
+            runs.append(current)
+        return runs
+
+    def after_commit_removal(self, num_removed):
+        """Update after commit removal"""
+        # Refresh the commit list
+        self.fetch_commit_list()
     
-    # Show success message
-    messagebox.showinfo("Success", f"Successfully removed {num_removed} commits")
+        # Show success message
+        messagebox.showinfo("Success", f"Successfully removed {num_removed} commits")
 
 
 
@@ -1819,8 +2384,8 @@ def after_commit_removal(self, num_removed):
                 )
                 
                 # Close the window and open the PR in browser
-                self.root.after(0, lambda: window.destroy())
-                self.root.after(0, lambda: webbrowser.open_new(pull_request.html_url))
+                self.root.after(0, window.destroy)
+                self.root.after(0, webbrowser.open_new, pull_request.html_url)
                 
                 return pull_request
                 
@@ -1841,9 +2406,22 @@ def after_commit_removal(self, num_removed):
         except:
             pass
             
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Start the main loop
         self.root.mainloop()
 
+    def on_close(self):
+        """Cancel background work and close the application"""
+        # Wake tasks sleeping on the rate limit and drop the ones not started yet
+        self.cancel_event.set()
+        for future in list(self.tasks.values()):
+            future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.g:
+            self.save_cache()
+        self.root.destroy()
+
 # Main entry point
 if __name__ == "__main__":
     app = GitHubCompare()